@@ -4,26 +4,71 @@ Provides easy-to-use methods for cross-language communication
 """
 
 import asyncio
-import json
+import functools
+import importlib.util
+import logging
 import time
-import uuid
-from typing import Any, Dict, List, Optional, Callable
-import aiohttp
+import itertools
+from urllib.parse import quote
+from collections import OrderedDict
+from typing import Any, Awaitable, Dict, Iterator, List, Optional, Callable, Set, Tuple, Union
+import httpx
+import orjson
 import websockets
+from websockets.extensions.permessage_deflate import ClientPerMessageDeflateFactory
 from dataclasses import dataclass
 from datetime import datetime
 
 
-@dataclass
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def _traced(op: str):
+    """Log failures of a client request before re-raising them"""
+    def deco(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                logger.exception("%s failed", op)
+                raise
+        return wrapper
+    return deco
+
+
+class InteropRPCError(Exception):
+    """An RPC call was rejected by the interop server or could not complete"""
+
+
+async def _raise_for_status(response: httpx.Response) -> None:
+    """Turn error statuses into httpx.HTTPStatusError for every request
+    
+    Hooks run before the body is read, so read it here to keep the server's
+    error message available on the raised exception.
+    """
+    if response.is_error:
+        await response.aread()
+    response.raise_for_status()
+
+
+@dataclass(slots=True)
 class InteropConfig:
     server_url: str = "http://localhost:4000"
     module_name: str = "python-module"
     language: str = "python"
     port: Optional[int] = None
     auto_register: bool = True
+    max_conns: int = 100
+    per_host: int = 32
+    batch_window_ms: float = 2.0
+    max_batch_size: int = 64
+    persistent_cache_dir: Optional[str] = None
+    ws_timeout: float = 10.0
 
 
-@dataclass
+@dataclass(slots=True)
 class InteropMessage:
     id: str
     target: str
@@ -34,9 +79,24 @@ class InteropMessage:
     status: str = "queued"
     result: Optional[Any] = None
     error: Optional[str] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "InteropMessage":
+        """Build a message from a server payload, ignoring unknown fields"""
+        return cls(
+            id=data["id"],
+            target=data["target"],
+            method=data["method"],
+            params=data.get("params") or {},
+            priority=data.get("priority", 0),
+            timestamp=data.get("timestamp", ""),
+            status=data.get("status", "queued"),
+            result=data.get("result"),
+            error=data.get("error")
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class ModuleInfo:
     name: str
     language: str
@@ -44,6 +104,18 @@ class ModuleInfo:
     port: Optional[int]
     registered_at: str
     last_seen: str
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ModuleInfo":
+        """Build module info from a server payload, ignoring unknown fields"""
+        return cls(
+            name=data["name"],
+            language=data["language"],
+            endpoints=data.get("endpoints") or [],
+            port=data.get("port"),
+            registered_at=data.get("registered_at", data.get("registeredAt", "")),
+            last_seen=data.get("last_seen", data.get("lastSeen", ""))
+        )
 
 
 class PolyglotInteropClient:
@@ -51,11 +123,38 @@ class PolyglotInteropClient:
     
     def __init__(self, config: InteropConfig = None):
         self.config = config or InteropConfig()
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional[httpx.AsyncClient] = None
         self.websocket: Optional[websockets.WebSocketServerProtocol] = None
-        self.message_handlers: Dict[str, Callable] = {}
+        # Pending WebSocket calls by message id, with the time they were sent
+        self.message_handlers: Dict[int, Tuple[float, asyncio.Future]] = {}
+        self._msg_ids = itertools.count(1)
+        # Constant head of every outbound WebSocket call frame
+        self._ws_prefix = b'{"type":"call","id":'
         self.running = False
         
+        # RPC calls waiting to be coalesced into a single batch request
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self._batch_supported = True
+        
+        # Results of idempotent RPC calls, keyed by request, with expiry times
+        self._rpc_cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._cache_max = 1024
+        
+        # Optional on-disk cache shared across processes for read-only endpoints
+        self._pcache = None
+        
+        # Requests currently on the wire, shared by identical concurrent callers
+        self._inflight: Dict[str, asyncio.Task] = {}
+        
+        # Pre-serialized outbound WebSocket frames, drained by a single writer,
+        # each with the future of the call waiting on it (None for subscribes)
+        self._ws_send_q: Optional["asyncio.Queue[Tuple[bytes, Optional[asyncio.Future]]]"] = None
+        self._ws_writer_task: Optional[asyncio.Task] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._ws_task: Optional[asyncio.Task] = None
+        
     async def __aenter__(self):
         await self.init()
         return self
@@ -65,265 +164,624 @@ class PolyglotInteropClient:
     
     async def init(self) -> None:
         """Initialize the client and optionally register with the interop server"""
-        self.session = aiohttp.ClientSession()
+        base = self.config.server_url.rstrip("/")
+        self._url_register = f"{base}/register"
+        self._url_unregister = f"{base}/register/{quote(self.config.module_name)}"
+        self._url_rpc = f"{base}/rpc"
+        self._url_rpc_batch = f"{base}/rpc/batch"
+        self._url_queue = f"{base}/queue"
+        self._url_queue_process = f"{base}/queue/process"
+        self._url_modules = f"{base}/modules"
+        self._url_health = f"{base}/health"
+        self._timeout = httpx.Timeout(30.0, connect=5.0)
+        
+        # Static request bodies are encoded once up front
+        self._json_headers = {"Content-Type": "application/json"}
+        self._register_body = orjson.dumps({
+            "name": self.config.module_name,
+            "language": self.config.language,
+            "endpoints": ["rpc"],
+            "port": self.config.port
+        })
+        
+        if self.config.persistent_cache_dir:
+            import diskcache
+            self._pcache = diskcache.Cache(self.config.persistent_cache_dir, size_limit=64 << 20)
+        
+        # httpx only negotiates HTTP/2 over TLS and needs the optional h2
+        # package; plain-http servers such as the bundled Node server are
+        # served over HTTP/1.1 keep-alive connections from the pool instead
+        http2 = base.startswith("https://") and importlib.util.find_spec("h2") is not None
+        self.session = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=self.config.max_conns,
+                max_keepalive_connections=self.config.per_host,
+                keepalive_expiry=75
+            ),
+            timeout=self._timeout,
+            event_hooks={"response": [_raise_for_status]}
+        )
+        
+        self._ws_send_q = asyncio.Queue(maxsize=1024)
+        self._ws_writer_task = asyncio.create_task(self._ws_writer())
+        self._reaper_task = asyncio.create_task(self._reap_handlers())
         
         if self.config.auto_register:
             await self.register()
             
         await self.connect_websocket()
     
+    @_traced("Registration")
     async def register(self) -> None:
         """Register this module with the interop server"""
-        try:
-            async with self.session.post(
-                f"{self.config.server_url}/register",
-                json={
-                    "name": self.config.module_name,
-                    "language": self.config.language,
-                    "endpoints": ["rpc"],
-                    "port": self.config.port
-                }
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Registration failed: {response.status}")
-                
-                result = await response.json()
-                print(f"✅ Module registered: {result['message']}")
-                
-        except Exception as e:
-            print(f"❌ Registration failed: {e}")
-            raise
+        response = await self.session.post(
+            self._url_register,
+            content=self._register_body,
+            headers=self._json_headers
+        )
+        result = orjson.loads(response.content)
+        logger.info("✅ Module registered: %s", result['message'])
     
+    @_traced("Unregistration")
     async def unregister(self) -> None:
         """Unregister this module from the interop server"""
-        try:
-            async with self.session.delete(
-                f"{self.config.server_url}/register/{self.config.module_name}"
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Unregistration failed: {response.status}")
-                
-                result = await response.json()
-                print(f"✅ Module unregistered: {result['message']}")
-                
-        except Exception as e:
-            print(f"❌ Unregistration failed: {e}")
-            raise
+        response = await self.session.delete(self._url_unregister)
+        result = orjson.loads(response.content)
+        logger.info("✅ Module unregistered: %s", result['message'])
     
-    async def call(self, target: str, method: str, params: Dict[str, Any] = None) -> Any:
-        """Call a method on another module synchronously"""
+    @_traced("RPC call")
+    async def call(self, target: str, method: str, params: Dict[str, Any] = None,
+                   cache_ttl: Optional[float] = None, dedupe: bool = False) -> Any:
+        """Call a method on another module synchronously
+        
+        Pass cache_ttl (seconds) for idempotent calls to reuse a recent result
+        instead of going back to the server. Identical concurrent calls share
+        one request when cache_ttl or dedupe is set; leave both unset for
+        calls with side effects.
+        """
         if params is None:
             params = {}
             
-        try:
-            async with self.session.post(
-                f"{self.config.server_url}/rpc",
-                json={
-                    "target": target,
-                    "method": method,
-                    "params": params
-                }
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"RPC call failed: {response.status}")
-                
-                result = await response.json()
-                return result["result"]
+        request = {
+            "target": target,
+            "method": method,
+            "params": params
+        }
+        
+        # Plain calls skip building the canonical key entirely
+        if not (cache_ttl or dedupe):
+            return await self._call_batched(request)
+            
+        key = self._rpc_key(target, method, params)
+        
+        if cache_ttl:
+            cached = self._rpc_cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                self._rpc_cache.move_to_end(key)
+                return cached[1]
+            
+        result = await self._single_flight(key, lambda: self._call_batched(request))
+            
+        if cache_ttl:
+            self._rpc_cache[key] = (time.monotonic() + cache_ttl, result)
+            self._rpc_cache.move_to_end(key)
+            while len(self._rpc_cache) > self._cache_max:
+                self._rpc_cache.popitem(last=False)
                 
-        except Exception as e:
-            print(f"❌ RPC call to {target}.{method} failed: {e}")
+        return result
+    
+    async def _call_batched(self, request: Dict[str, Any]) -> Any:
+        """Queue an RPC request for the next batch and wait for its result"""
+        if not self._batch_supported:
+            return await self._post_rpc(request)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((request, future))
+        
+        if len(self._pending) >= self.config.max_batch_size:
+            self._dispatch_pending()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_soon())
+            
+        return await future
+    
+    async def _single_flight(self, key: str, make_request: Callable[[], Awaitable[Any]]) -> Any:
+        """Share one in-flight request between concurrent callers with the same key
+        
+        The request runs in its own task, so cancelling one caller only detaches
+        that caller and leaves the others waiting for the shared result.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(make_request())
+            self._inflight[key] = task
+            
+            def forget(done: asyncio.Task) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+                    
+            task.add_done_callback(forget)
+            
+        return await asyncio.shield(task)
+    
+    async def call_batch(self, requests: List[Dict[str, Any]]) -> List[Any]:
+        """Call several methods at once, sharing a single batch request"""
+        return await asyncio.gather(*(
+            self.call(request["target"], request["method"], request.get("params"))
+            for request in requests
+        ))
+    
+    def bind(self, target: str, method: str) -> Callable[..., Awaitable[Any]]:
+        """Build a coroutine function calling one fixed target method directly
+        
+        The request prefix is encoded once, so each call only serializes params.
+        Bound calls go straight to /rpc and skip batching and result caching.
+        """
+        prefix = orjson.dumps({"target": target, "method": method})[:-1] + b',"params":'
+        
+        @_traced("RPC call")
+        async def _call(params: Dict[str, Any] = None) -> Any:
+            return await self._post_rpc_body(
+                prefix + orjson.dumps(params or {}, option=orjson.OPT_NON_STR_KEYS) + b'}'
+            )
+            
+        _call.__name__ = f"{target}_{method}"
+        return _call
+    
+    @staticmethod
+    def _rpc_key(target: str, method: str, params: Dict[str, Any]) -> str:
+        """Build a canonical key identifying an RPC request"""
+        return f"{target}|{method}|" + orjson.dumps(
+            params, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        ).decode()
+    
+    async def _post_rpc(self, request: Dict[str, Any]) -> Any:
+        """Send a single RPC request"""
+        return await self._post_rpc_body(orjson.dumps(request, option=orjson.OPT_NON_STR_KEYS))
+    
+    async def _post_rpc_body(self, body: bytes) -> Any:
+        """Send a single pre-encoded RPC request"""
+        try:
+            response = await self.session.post(
+                self._url_rpc,
+                content=body,
+                headers=self._json_headers
+            )
+        except httpx.HTTPStatusError as e:
+            raise self._rpc_error("RPC call failed", e) from e
+            
+        return orjson.loads(response.content)["result"]
+    
+    @staticmethod
+    def _rpc_error(prefix: str, e: httpx.HTTPStatusError) -> InteropRPCError:
+        """Build an InteropRPCError carrying the server's error message, if any"""
+        try:
+            error = orjson.loads(e.response.content)["error"]
+        except Exception:
+            error = e.response.status_code
+        return InteropRPCError(f"{prefix}: {error}")
+    
+    def _dispatch_pending(self) -> None:
+        """Send the pending RPC calls right away"""
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._send_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _flush_soon(self) -> None:
+        """Wait for the batch window to close, then send the pending RPC calls"""
+        await asyncio.sleep(self.config.batch_window_ms / 1000)
+        self._flush_task = None
+        batch, self._pending = self._pending, []
+        await self._send_batch(batch)
+    
+    async def _send_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Send a batch of RPC calls and resolve each caller's future"""
+        if not batch:
+            return
+            
+        try:
+            await self._send_batch_request(batch)
+        except asyncio.CancelledError:
+            self._fail_batch(batch, InteropRPCError("RPC call cancelled: client closed"))
             raise
     
-    async def send(self, target: str, method: str, params: Dict[str, Any] = None, priority: int = 0) -> str:
-        """Send a message to another module asynchronously"""
-        if params is None:
-            params = {}
+    async def _send_batch_request(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Post a batch to the server, falling back to single calls when needed"""
+        if len(batch) == 1 or not self._batch_supported:
+            await asyncio.gather(*(self._resolve_single(request, future) for request, future in batch))
+            return
             
         try:
-            async with self.session.post(
-                f"{self.config.server_url}/queue",
-                json={
-                    "target": target,
-                    "method": method,
-                    "params": params,
-                    "priority": priority
-                }
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Message send failed: {response.status}")
+            response = await self.session.post(
+                self._url_rpc_batch,
+                content=orjson.dumps([request for request, _ in batch], option=orjson.OPT_NON_STR_KEYS),
+                headers=self._json_headers
+            )
+            results = orjson.loads(response.content)
+                
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            
+            if status == 413:
+                # Batch body too large for the server, retry it in two halves
+                middle = len(batch) // 2
+                await asyncio.gather(
+                    self._send_batch_request(batch[:middle]),
+                    self._send_batch_request(batch[middle:])
+                )
+                return
                 
-                result = await response.json()
-                print(f"📤 Message queued: {result['messageId']} -> {target}.{method}")
-                return result["messageId"]
+            if status != 404:
+                error = self._rpc_error("RPC batch call failed", e)
+                error.__cause__ = e
+                self._fail_batch(batch, error)
+                return
                 
+            # Server has no batch endpoint, fall back to one call per request
+            self._batch_supported = False
+            await asyncio.gather(*(self._resolve_single(request, future) for request, future in batch))
+            return
+            
         except Exception as e:
-            print(f"❌ Message send to {target}.{method} failed: {e}")
-            raise
+            self._fail_batch(batch, e)
+            return
+            
+        if not isinstance(results, list) or len(results) != len(batch):
+            self._fail_batch(batch, InteropRPCError("RPC batch call failed: malformed response"))
+            return
+            
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if not isinstance(result, dict) or "result" not in result:
+                error = result.get("error") if isinstance(result, dict) else "malformed result"
+                future.set_exception(InteropRPCError(f"RPC call failed: {error}"))
+            else:
+                future.set_result(result["result"])
+    
+    @staticmethod
+    def _fail_batch(batch: List[Tuple[Dict[str, Any], asyncio.Future]], error: Exception) -> None:
+        """Fail every unresolved future in a batch with the same error"""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
     
-    async def get_queue(self) -> List[InteropMessage]:
-        """Get the current message queue"""
+    async def _resolve_single(self, request: Dict[str, Any], future: asyncio.Future) -> None:
+        """Send one RPC request and resolve its future"""
         try:
-            async with self.session.get(f"{self.config.server_url}/queue") as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to get queue: {response.status}")
-                
-                result = await response.json()
-                return [InteropMessage(**msg) for msg in result["queue"]]
-                
+            result = await self._post_rpc(request)
         except Exception as e:
-            print(f"❌ Failed to get queue: {e}")
-            raise
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
     
+    @_traced("Message send")
+    async def send(self, target: str, method: str, params: Dict[str, Any] = None, priority: int = 0) -> str:
+        """Send a message to another module asynchronously"""
+        if params is None:
+            params = {}
+            
+        response = await self.session.post(
+            self._url_queue,
+            content=orjson.dumps({
+                "target": target,
+                "method": method,
+                "params": params,
+                "priority": priority
+            }, option=orjson.OPT_NON_STR_KEYS),
+            headers=self._json_headers
+        )
+        result = orjson.loads(response.content)
+        logger.info("📤 Message queued: %s -> %s.%s", result['messageId'], target, method)
+        return result["messageId"]
+    
+    @_traced("Get queue")
+    async def get_queue(self, materialize: bool = True) -> Union[List[InteropMessage], Iterator[InteropMessage]]:
+        """Get the current message queue
+        
+        With materialize=False the messages are built lazily while iterating.
+        """
+        response = await self.session.get(self._url_queue)
+        result = orjson.loads(response.content)
+        
+        messages = map(InteropMessage.from_dict, result["queue"])
+        return list(messages) if materialize else messages
+    
+    @_traced("Queue processing")
     async def process_queue(self, limit: int = 10) -> List[Any]:
         """Process messages from the queue"""
-        try:
-            async with self.session.post(
-                f"{self.config.server_url}/queue/process",
-                json={"limit": limit}
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Queue processing failed: {response.status}")
-                
-                result = await response.json()
-                print(f"📋 Processed {result['processed']} messages, {result['remaining']} remaining")
-                return result["results"]
+        response = await self.session.post(
+            self._url_queue_process,
+            content=orjson.dumps({"limit": limit}),
+            headers=self._json_headers
+        )
+        result = orjson.loads(response.content)
+        
+        logger.info("📋 Processed %s messages, %s remaining", result['processed'], result['remaining'])
+        return result["results"]
+    
+    async def process_queue_concurrent(self, limit: int = 32, concurrency: int = 8) -> List[Any]:
+        """Process queued messages individually, several at a time"""
+        semaphore = asyncio.Semaphore(concurrency)
+        messages = itertools.islice(await self.get_queue(materialize=False), limit)
+        
+        async def process_one(message: InteropMessage) -> Any:
+            async with semaphore:
+                return await self._process_one(message.id)
                 
-        except Exception as e:
-            print(f"❌ Queue processing failed: {e}")
-            raise
+        return await asyncio.gather(*(process_one(message) for message in messages), return_exceptions=True)
+    
+    @_traced("Queue processing")
+    async def _process_one(self, message_id: str) -> Any:
+        """Process a single queued message by id"""
+        response = await self.session.post(f"{self._url_queue_process}/{quote(message_id)}")
+        return orjson.loads(response.content)["result"]
     
+    @_traced("Get modules")
     async def get_modules(self) -> List[ModuleInfo]:
         """Get list of all registered modules"""
-        try:
-            async with self.session.get(f"{self.config.server_url}/modules") as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to get modules: {response.status}")
-                
-                result = await response.json()
-                return [ModuleInfo(**module) for module in result["modules"]]
+        # The cache directory may be shared by clients of different servers
+        cache_key = f"modules|{self.config.server_url}"
+        
+        if self._pcache is not None:
+            modules = await asyncio.to_thread(self._pcache.get, cache_key)
+            if modules is not None:
+                return list(map(ModuleInfo.from_dict, modules))
                 
-        except Exception as e:
-            print(f"❌ Failed to get modules: {e}")
-            raise
+        response = await self.session.get(self._url_modules)
+        result = orjson.loads(response.content)
+        
+        if self._pcache is not None:
+            await asyncio.to_thread(self._pcache.set, cache_key, result["modules"], expire=5)
+            
+        return list(map(ModuleInfo.from_dict, result["modules"]))
     
+    @_traced("Health check")
     async def health(self) -> Dict[str, Any]:
         """Check server health"""
-        try:
-            async with self.session.get(f"{self.config.server_url}/health") as response:
-                if response.status != 200:
-                    raise Exception(f"Health check failed: {response.status}")
-                
-                return await response.json()
-                
-        except Exception as e:
-            print(f"❌ Health check failed: {e}")
-            raise
+        response = await self.session.get(self._url_health)
+        return orjson.loads(response.content)
     
     async def connect_websocket(self) -> None:
         """Connect to WebSocket for real-time communication"""
-        ws_url = self.config.server_url.replace("http", "ws")
-        
         try:
-            self.websocket = await websockets.connect(ws_url)
-            print("🔌 WebSocket connected")
-            
-            # Start listening for messages
-            asyncio.create_task(self._websocket_listener())
+            await self._reconnect()
+            logger.info("🔌 WebSocket connected")
             
         except Exception as e:
-            print(f"❌ Failed to connect WebSocket: {e}")
-    
-    async def _websocket_listener(self) -> None:
-        """Listen for WebSocket messages"""
-        if not self.websocket:
-            return
+            logger.error("❌ Failed to connect WebSocket: %s", e)
             
-        try:
-            async for message in self.websocket:
+        # Start listening for messages, (re)connecting as needed
+        self.running = True
+        if self._ws_task is None or self._ws_task.done():
+            self._ws_task = asyncio.create_task(self._run_ws())
+    
+    async def _reconnect(self) -> None:
+        """Open a new WebSocket connection to the interop server"""
+        old, self.websocket = self.websocket, None
+        if old is not None:
+            try:
+                await old.close()
+            except Exception as e:
+                logger.error("❌ Failed to close old WebSocket: %s", e)
+                
+        ws_url = self.config.server_url.replace("http", "ws")
+        self.websocket = await websockets.connect(
+            ws_url,
+            compression="deflate",
+            extensions=[ClientPerMessageDeflateFactory(client_max_window_bits=15)],
+            max_size=16 * 1024 * 1024,
+            max_queue=64,
+            write_limit=2 ** 20,
+            ping_interval=20,
+            ping_timeout=20
+        )
+    
+    async def _run_ws(self) -> None:
+        """Listen for WebSocket messages, reconnecting with exponential backoff"""
+        attempt = 0
+        
+        while self.running:
+            if self.websocket is not None:
                 try:
-                    data = json.loads(message)
-                    await self._handle_websocket_message(data)
-                except json.JSONDecodeError as e:
-                    print(f"❌ Failed to parse WebSocket message: {e}")
+                    async for message in self.websocket:
+                        attempt = 0
+                        try:
+                            data = orjson.loads(message)
+                            await self._handle_websocket_message(data)
+                        except orjson.JSONDecodeError as e:
+                            logger.error("❌ Failed to parse WebSocket message: %s", e)
+                        except Exception as e:
+                            logger.error("❌ Failed to handle WebSocket message: %s", e)
+                            
+                except websockets.exceptions.ConnectionClosed:
+                    pass
+                except Exception as e:
+                    logger.error("❌ WebSocket error: %s", e)
                     
-        except websockets.exceptions.ConnectionClosed:
-            print("🔌 WebSocket disconnected")
-            # Attempt to reconnect after 5 seconds
-            await asyncio.sleep(5)
-            await self.connect_websocket()
-        except Exception as e:
-            print(f"❌ WebSocket error: {e}")
+                if not self.running:
+                    break
+                    
+                logger.info("🔌 WebSocket disconnected")
+                
+            while self.running:
+                delay = min(30, 0.5 * 2 ** attempt)
+                attempt += 1
+                await asyncio.sleep(delay)
+                
+                try:
+                    await self._reconnect()
+                    logger.info("🔌 WebSocket reconnected")
+                    break
+                except Exception as e:
+                    logger.error("❌ Failed to reconnect WebSocket: %s", e)
     
     async def _handle_websocket_message(self, message: Dict[str, Any]) -> None:
         """Handle incoming WebSocket messages"""
         msg_type = message.get("type")
         
         if msg_type == "modules":
-            print(f"📋 Available modules: {message['data']}")
+            logger.info("📋 Available modules: %s", message['data'])
             
         elif msg_type == "response":
             message_id = message.get("id")
             if message_id in self.message_handlers:
-                handler = self.message_handlers.pop(message_id)
-                handler(message["result"])
+                _, future = self.message_handlers.pop(message_id)
+                if not future.done():
+                    future.set_result(message.get("result"))
                 
         elif msg_type == "error":
-            print(f"❌ WebSocket error: {message['error']}")
+            logger.error("❌ WebSocket error: %s", message['error'])
             
         else:
-            print(f"📨 Unknown WebSocket message: {message}")
+            logger.warning("📨 Unknown WebSocket message: %s", message)
     
-    async def send_websocket(self, target: str, method: str, params: Dict[str, Any] = None) -> Any:
-        """Send a WebSocket message and wait for response"""
+    async def send_websocket(self, target: str, method: str, params: Dict[str, Any] = None,
+                             dedupe: bool = False) -> Any:
+        """Send a WebSocket message and wait for response
+        
+        With dedupe set, identical concurrent calls share one message.
+        """
         if not self.websocket:
             raise Exception("WebSocket not connected")
             
         if params is None:
             params = {}
             
-        message_id = f"ws_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
-        
-        # Set up response handler
-        future = asyncio.Future()
-        self.message_handlers[message_id] = future.set_result
+        if not dedupe:
+            return await self._send_websocket(target, method, params)
+            
+        return await self._single_flight(
+            "ws|" + self._rpc_key(target, method, params),
+            lambda: self._send_websocket(target, method, params)
+        )
+    
+    async def _send_websocket(self, target: str, method: str, params: Dict[str, Any]) -> Any:
+        """Send a single WebSocket call and wait for its response"""
+        message_id = next(self._msg_ids)
         
-        # Send message
-        await self.websocket.send(json.dumps({
-            "type": "call",
-            "id": message_id,
-            "target": target,
-            "method": method,
-            "params": params
-        }))
+        future = asyncio.get_running_loop().create_future()
         
-        # Wait for response with timeout
         try:
-            result = await asyncio.wait_for(future, timeout=10.0)
-            return result
+            # Hand the frame to the writer; blocks when the send queue is full
+            await self._ws_send_q.put((
+                self._ws_prefix + str(message_id).encode()
+                + b',"target":' + orjson.dumps(target)
+                + b',"method":' + orjson.dumps(method)
+                + b',"params":' + orjson.dumps(params, option=orjson.OPT_NON_STR_KEYS) + b'}',
+                future
+            ))
+            
+            # Set up response handler once queued, so time spent waiting
+            # for queue space does not count towards the handler's age
+            self.message_handlers[message_id] = (time.monotonic(), future)
+            
+            # Wait for response with timeout
+            return await asyncio.wait_for(future, timeout=self.config.ws_timeout)
         except asyncio.TimeoutError:
-            self.message_handlers.pop(message_id, None)
             raise Exception("WebSocket call timeout")
+        finally:
+            self.message_handlers.pop(message_id, None)
+            if not future.done():
+                future.cancel()
+    
+    async def _reap_handlers(self) -> None:
+        """Periodically drop WebSocket handlers whose callers are long gone"""
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.monotonic() - 2 * self.config.ws_timeout
+            stale = [message_id for message_id, (sent_at, _) in self.message_handlers.items() if sent_at < cutoff]
+            for message_id in stale:
+                _, future = self.message_handlers.pop(message_id)
+                if not future.done():
+                    future.set_exception(TimeoutError("WebSocket call timeout"))
+    
+    async def _ws_writer(self) -> None:
+        """Send queued WebSocket frames in order from a single coroutine
+        
+        A failed send is passed to the waiting caller, if any, right away.
+        """
+        while True:
+            frame, future = await self._ws_send_q.get()
+            try:
+                if not self.websocket:
+                    raise Exception("WebSocket not connected")
+                await self.websocket.send(frame)
+            except Exception as e:
+                logger.error("❌ WebSocket send failed: %s", e)
+                if future is not None and not future.done():
+                    future.set_exception(e)
     
-    def subscribe(self, target: str) -> None:
+    async def subscribe(self, target: str) -> None:
         """Subscribe to module events"""
         if not self.websocket:
             raise Exception("WebSocket not connected")
             
-        asyncio.create_task(self.websocket.send(json.dumps({
+        await self._ws_send_q.put((orjson.dumps({
+            "type": "subscribe",
+            "target": target
+        }), None))
+    
+    def subscribe_nowait(self, target: str) -> None:
+        """Subscribe to module events without waiting, raising asyncio.QueueFull under back-pressure"""
+        if not self.websocket:
+            raise Exception("WebSocket not connected")
+            
+        self._ws_send_q.put_nowait((orjson.dumps({
             "type": "subscribe",
             "target": target
-        })))
+        }), None))
     
     async def close(self) -> None:
         """Close the client and cleanup"""
+        self.running = False
+        
+        if self._ws_task:
+            self._ws_task.cancel()
+            self._ws_task = None
+            
+        # Stop batches in flight; their callers are failed rather than left waiting
+        batch_tasks = list(self._batch_tasks)
+        if self._flush_task:
+            batch_tasks.append(self._flush_task)
+            self._flush_task = None
+        for task in batch_tasks:
+            task.cancel()
+        if batch_tasks:
+            await asyncio.gather(*batch_tasks, return_exceptions=True)
+            
+        batch, self._pending = self._pending, []
+        self._fail_batch(batch, InteropRPCError("RPC call cancelled: client closed"))
+            
+        if self._ws_writer_task:
+            self._ws_writer_task.cancel()
+            self._ws_writer_task = None
+            
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+            
+        # Frames left unsent will never be answered
+        for _, future in self.message_handlers.values():
+            if not future.done():
+                future.set_exception(Exception("WebSocket closed"))
+            
         if self.websocket:
             await self.websocket.close()
             self.websocket = None
             
         if self.session:
-            await self.session.close()
+            await self.session.aclose()
             self.session = None
             
+        if self._pcache is not None:
+            self._pcache.close()
+            self._pcache = None
+            
         if self.config.auto_register:
             await self.unregister()
 
@@ -8,7 +8,14 @@ class PolyglotInteropServer {
         this.port = port;
         this.app = express();
         this.server = http.createServer(this.app);
-        this.wss = new WebSocket.Server({ server: this.server });
+        // Compress larger frames such as module lists; small frames go out as-is
+        this.wss = new WebSocket.Server({
+            server: this.server,
+            perMessageDeflate: {
+                clientMaxWindowBits: true,
+                threshold: 1024
+            }
+        });
         
         // Registry for language modules
         this.modules = new Map();
@@ -23,6 +30,8 @@ class PolyglotInteropServer {
     
     setupMiddleware() {
         this.app.use(cors());
+        // Batches carry up to 64 calls, so allow a larger body than single requests
+        this.app.use('/rpc/batch', express.json({ limit: '8mb' }));
         this.app.use(express.json());
         this.app.use(express.urlencoded({ extended: true }));
     }
@@ -122,6 +131,30 @@ class PolyglotInteropServer {
             }
         });
         
+        // Batched JSON-RPC endpoint, one result entry per call in request order
+        this.app.post('/rpc/batch', async (req, res) => {
+            const calls = Array.isArray(req.body) ? req.body : [];
+            
+            const results = await Promise.all(calls.map(async ({ method, params, target }) => {
+                if (!method || !target) {
+                    return { error: 'Method and target are required' };
+                }
+                
+                if (!this.modules.has(target)) {
+                    return { error: `Target module ${target} not found` };
+                }
+                
+                try {
+                    const result = await this.callModule(target, method, params);
+                    return { success: true, result };
+                } catch (error) {
+                    return { error: error.message };
+                }
+            }));
+            
+            res.json(results);
+        });
+        
         // Send message to queue (async)
         this.app.post('/queue', (req, res) => {
             const { target, method, params, priority = 0 } = req.body;
@@ -170,18 +203,7 @@ class PolyglotInteropServer {
             for (let i = 0; i < Math.min(limit, this.messageQueue.length); i++) {
                 const message = this.messageQueue.shift();
                 if (message) {
-                    try {
-                        const result = await this.callModule(message.target, message.method, message.params);
-                        message.status = 'completed';
-                        message.result = result;
-                        message.completedAt = new Date().toISOString();
-                        processed.push(message);
-                    } catch (error) {
-                        message.status = 'failed';
-                        message.error = error.message;
-                        message.failedAt = new Date().toISOString();
-                        processed.push(message);
-                    }
+                    processed.push(await this.processMessage(message));
                 }
             }
             
@@ -191,6 +213,25 @@ class PolyglotInteropServer {
                 results: processed
             });
         });
+        
+        // Process a single queued message by id
+        this.app.post('/queue/process/:id', async (req, res) => {
+            const { id } = req.params;
+            const index = this.messageQueue.findIndex(message => message.id === id);
+            
+            if (index === -1) {
+                return res.status(404).json({
+                    error: `Message ${id} not found`
+                });
+            }
+            
+            const [message] = this.messageQueue.splice(index, 1);
+            
+            res.json({
+                result: await this.processMessage(message),
+                remaining: this.messageQueue.length
+            });
+        });
     }
     
     setupWebSocket() {
@@ -289,6 +330,21 @@ class PolyglotInteropServer {
         };
     }
     
+    async processMessage(message) {
+        try {
+            const result = await this.callModule(message.target, message.method, message.params);
+            message.status = 'completed';
+            message.result = result;
+            message.completedAt = new Date().toISOString();
+        } catch (error) {
+            message.status = 'failed';
+            message.error = error.message;
+            message.failedAt = new Date().toISOString();
+        }
+        
+        return message;
+    }
+    
     generateMessageId() {
         return `msg_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
     }
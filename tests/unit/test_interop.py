@@ -0,0 +1,327 @@
+# Test Python interop client
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+orjson = pytest.importorskip("orjson")
+pytest.importorskip("websockets")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "meta" / "interop"))
+
+from client import InteropConfig, InteropRPCError, PolyglotInteropClient, _raise_for_status  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.content = orjson.dumps(body)
+
+
+class FakeSession:
+    """Records posted bodies and answers them with a handler(url, body)"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.posts = []
+
+    async def post(self, url, content=None, headers=None):
+        body = orjson.loads(content) if content else None
+        self.posts.append((url, body))
+        await asyncio.sleep(0)
+        return FakeResponse(self.handler(url, body))
+
+
+def http_error(url, status, body=None):
+    request = httpx.Request("POST", url)
+    response = httpx.Response(status, request=request, content=orjson.dumps(body or {}))
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+class StreamedBody(httpx.AsyncByteStream):
+    """Response body that is only available once read, as on a real connection"""
+
+    def __init__(self, body):
+        self.body = orjson.dumps(body)
+
+    async def __aiter__(self):
+        yield self.body
+
+
+def make_http_client(handler, **config):
+    """Client backed by a real httpx.AsyncClient answering through handler(request)"""
+    client = make_client(echo, **config)
+    client.session = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        event_hooks={"response": [_raise_for_status]}
+    )
+    return client
+
+
+def make_client(handler, **config):
+    client = PolyglotInteropClient(InteropConfig(auto_register=False, **config))
+    client.session = FakeSession(handler)
+    client._url_rpc = "http://interop/rpc"
+    client._url_rpc_batch = "http://interop/rpc/batch"
+    client._json_headers = {"Content-Type": "application/json"}
+    return client
+
+
+def echo(url, body):
+    if url.endswith("/batch"):
+        return [{"success": True, "result": call["params"]} for call in body]
+    return {"success": True, "result": body["params"]}
+
+
+def test_concurrent_calls_share_one_batch_request():
+    client = make_client(echo)
+
+    async def run():
+        return await asyncio.gather(*(client.call("t", "m", {"n": n}) for n in range(3)))
+
+    assert asyncio.run(run()) == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert [url for url, _ in client.session.posts] == ["http://interop/rpc/batch"]
+
+
+def test_batch_flushes_at_max_size():
+    client = make_client(echo, max_batch_size=2, batch_window_ms=1000)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(client.call("t", "m", {"n": 1}), client.call("t", "m", {"n": 2})),
+            timeout=1
+        )
+
+    assert asyncio.run(run()) == [{"n": 1}, {"n": 2}]
+    assert len(client.session.posts) == 1
+
+
+def test_missing_batch_endpoint_falls_back_to_single_calls():
+    def handler(url, body):
+        if url.endswith("/batch"):
+            raise http_error(url, 404)
+        return echo(url, body)
+
+    client = make_client(handler)
+
+    async def run():
+        return await asyncio.gather(client.call("t", "m", {"n": 1}), client.call("t", "m", {"n": 2}))
+
+    assert asyncio.run(run()) == [{"n": 1}, {"n": 2}]
+    assert client._batch_supported is False
+    assert [url for url, _ in client.session.posts].count("http://interop/rpc") == 2
+
+
+def test_short_batch_response_fails_every_unanswered_call():
+    client = make_client(lambda url, body: [{"success": True, "result": 1}])
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(client.call("t", "a"), client.call("t", "b"), return_exceptions=True),
+            timeout=1
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, InteropRPCError) for result in results)
+
+
+def test_call_errors_have_the_same_type_alone_and_batched():
+    def handler(url, body):
+        if url.endswith("/batch"):
+            return [{"error": "boom"} for _ in body]
+        raise http_error(url, 500, {"error": "boom"})
+
+    client = make_client(handler)
+
+    async def run():
+        alone = await asyncio.gather(client.call("t", "m"), return_exceptions=True)
+        batched = await asyncio.gather(client.call("t", "a"), client.call("t", "b"), return_exceptions=True)
+        return alone + batched
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, InteropRPCError) for result in results)
+    assert all("boom" in str(result) for result in results)
+
+
+def test_close_fails_calls_waiting_for_the_batch_window():
+    client = make_client(echo, batch_window_ms=1000)
+    client.session = None
+
+    async def run():
+        call = asyncio.create_task(client.call("t", "m"))
+        await asyncio.sleep(0)
+        await client.close()
+        return await asyncio.wait_for(asyncio.gather(call, return_exceptions=True), timeout=1)
+
+    (result,) = asyncio.run(run())
+    assert isinstance(result, InteropRPCError)
+
+
+def test_params_with_non_string_keys_are_serialized():
+    client = make_client(echo)
+
+    assert asyncio.run(client.call("t", "m", {"ids": {1: "a"}})) == {"ids": {"1": "a"}}
+
+
+def test_identical_calls_are_not_merged_by_default():
+    client = make_client(echo)
+
+    async def run():
+        return await asyncio.gather(client.call("t", "save", {"n": 1}), client.call("t", "save", {"n": 1}))
+
+    asyncio.run(run())
+    assert len(client.session.posts[0][1]) == 2
+
+
+def test_deduped_calls_share_one_request():
+    client = make_client(echo)
+
+    async def run():
+        return await asyncio.gather(*(client.call("t", "get", {"n": 1}, dedupe=True) for _ in range(3)))
+
+    assert asyncio.run(run()) == [{"n": 1}] * 3
+    assert client.session.posts == [("http://interop/rpc", {"target": "t", "method": "get", "params": {"n": 1}})]
+
+
+def test_cancelling_one_deduped_caller_does_not_cancel_the_others():
+    client = make_client(echo, batch_window_ms=20)
+
+    async def run():
+        first = asyncio.create_task(client.call("t", "get", dedupe=True))
+        second = asyncio.create_task(client.call("t", "get", dedupe=True))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await asyncio.wait_for(second, timeout=1)
+
+    assert asyncio.run(run()) == {}
+
+
+class FailingWebSocket:
+    async def send(self, frame):
+        raise ConnectionError("socket gone")
+
+
+def test_websocket_send_error_reaches_the_caller():
+    client = make_client(echo, ws_timeout=5)
+    client.websocket = FailingWebSocket()
+
+    async def run():
+        client._ws_send_q = asyncio.Queue()
+        writer = asyncio.create_task(client._ws_writer())
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(client.send_websocket("t", "m"), return_exceptions=True),
+                timeout=1
+            )
+        finally:
+            writer.cancel()
+
+    (result,) = asyncio.run(run())
+    assert isinstance(result, ConnectionError)
+
+
+class ScriptedWebSocket:
+    def __init__(self, frames):
+        self.frames = frames
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for frame in self.frames:
+            yield frame
+
+
+def test_bad_websocket_frame_does_not_force_a_reconnect():
+    client = make_client(echo)
+    client.websocket = ScriptedWebSocket([b"[1]", b'{"type": "response", "id": 1}'])
+    future_holder = {}
+    reconnects = []
+
+    async def reconnect():
+        reconnects.append(True)
+        client.running = False
+
+    async def run():
+        future_holder["f"] = asyncio.get_running_loop().create_future()
+        client.message_handlers[1] = (0.0, future_holder["f"])
+        client._reconnect = reconnect
+        client.running = True
+        await asyncio.wait_for(client._run_ws(), timeout=5)
+        return future_holder["f"].result()
+
+    # Both frames are consumed; only the end of the stream triggers a reconnect
+    assert asyncio.run(run()) is None
+    assert reconnects == [True]
+
+
+def test_server_error_message_survives_the_status_hook():
+    def handler(request):
+        return httpx.Response(500, stream=StreamedBody({"error": "target exploded"}))
+
+    client = make_http_client(handler)
+
+    async def run():
+        return await asyncio.gather(client.call("t", "m"), return_exceptions=True)
+
+    (result,) = asyncio.run(run())
+    assert isinstance(result, InteropRPCError)
+    assert "target exploded" in str(result)
+
+
+def test_batch_level_server_error_raises_interop_rpc_error():
+    def handler(url, body):
+        if url.endswith("/batch"):
+            raise http_error(url, 500, {"error": "batch exploded"})
+        return echo(url, body)
+
+    client = make_client(handler)
+
+    async def run():
+        return await asyncio.gather(client.call("t", "a"), client.call("t", "b"), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, InteropRPCError) for result in results)
+    assert all("batch exploded" in str(result) for result in results)
+
+
+def test_oversized_batch_is_split_until_it_fits():
+    def handler(url, body):
+        if url.endswith("/batch") and len(body) > 2:
+            raise http_error(url, 413)
+        return echo(url, body)
+
+    client = make_client(handler)
+
+    async def run():
+        return await asyncio.gather(*(client.call("t", "m", {"n": n}) for n in range(5)))
+
+    assert asyncio.run(run()) == [{"n": n} for n in range(5)]
+    assert client._batch_supported is True
+
+
+def test_bound_call_sends_a_valid_rpc_body():
+    client = make_client(echo)
+    save_data = client.bind("go-module", "saveData")
+
+    assert asyncio.run(save_data({"ids": {1: "a"}})) == {"ids": {"1": "a"}}
+    assert client.session.posts == [
+        ("http://interop/rpc", {"target": "go-module", "method": "saveData", "params": {"ids": {"1": "a"}}})
+    ]
+    assert save_data.__name__ == "go-module_saveData"
+
+
+def test_bound_call_errors_match_unbound_calls():
+    def handler(request):
+        return httpx.Response(500, stream=StreamedBody({"error": "target exploded"}))
+
+    client = make_http_client(handler)
+    save_data = client.bind("go-module", "saveData")
+
+    async def run():
+        return await asyncio.gather(save_data(), return_exceptions=True)
+
+    (result,) = asyncio.run(run())
+    assert isinstance(result, InteropRPCError)
+    assert "target exploded" in str(result)